@@ -0,0 +1,364 @@
+from __future__ import annotations
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from base64 import b64encode
+from collections import defaultdict
+from typing import Any, Iterator
+from sqlalchemy.orm import scoped_session, sessionmaker
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+LOGIN = 'obciazenie'
+HASLO = 'obciazenie'
+
+
+class _CichyHandler(WSGIRequestHandler):
+    """
+    Handler serwera HTTP/1.1 (keep-alive) bez logowania każdego żądania.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs) -> None:
+        pass
+
+
+class Statystyki:
+    """
+    Zbiera czasy odpowiedzi i statusy dla poszczególnych endpointów.
+    Bezpieczna do użycia z wielu wątków.
+    """
+
+    def __init__(self):
+        self._blokada = threading.Lock()
+        self.czasy: dict[str, list[float]] = defaultdict(list)
+        self.statusy: dict[str, dict[str, int]] = defaultdict(
+            lambda: defaultdict(int))
+        self.bledy: dict[str, int] = defaultdict(int)
+
+    def zapisz(self, endpoint: str, czas_ms: float, status: str,
+               blad: bool) -> None:
+        with self._blokada:
+            self.czasy[endpoint].append(czas_ms)
+            self.statusy[endpoint][status] += 1
+            if blad:
+                self.bledy[endpoint] += 1
+
+
+def percentyl(posortowane: list[float], p: float) -> float:
+    """
+    Zwraca percentyl metodą najbliższej rangi.
+
+    :param posortowane: Posortowana rosnąco lista wartości.
+    :param p: Percentyl z przedziału (0, 100].
+    :return: Wartość percentyla (0.0 dla pustej listy).
+    """
+    if not posortowane:
+        return 0.0
+    indeks = max(0, -(-len(posortowane) * p // 100) - 1)
+    return posortowane[int(indeks)]
+
+
+def _opis_endpointu(czasy: list[float], bledy: int,
+                    statusy: dict[str, int], czas_s: float) -> dict[str, Any]:
+    posortowane = sorted(czasy)
+    liczba = len(posortowane)
+    return {
+        "liczba": liczba,
+        "rps": round(liczba / czas_s, 2) if czas_s else 0.0,
+        "p50_ms": round(percentyl(posortowane, 50), 3),
+        "p95_ms": round(percentyl(posortowane, 95), 3),
+        "p99_ms": round(percentyl(posortowane, 99), 3),
+        "bledy": bledy,
+        "procent_bledow": round(100 * bledy / liczba, 2) if liczba else 0.0,
+        "statusy": dict(sorted(statusy.items())),
+    }
+
+
+def podsumowanie(statystyki: Statystyki, czas_s: float,
+                 konfiguracja: dict[str, Any]) -> dict[str, Any]:
+    """
+    Buduje podsumowanie testu w postaci słownika gotowego do zapisu w JSON.
+
+    :param statystyki: Zebrane statystyki.
+    :param czas_s: Czas trwania testu w sekundach.
+    :param konfiguracja: Parametry uruchomienia testu.
+    :return: Słownik z wynikami dla endpointów i łącznymi.
+    """
+    endpointy = {
+        endpoint: _opis_endpointu(
+            czasy, statystyki.bledy[endpoint],
+            statystyki.statusy[endpoint], czas_s)
+        for endpoint, czasy in sorted(statystyki.czasy.items())
+    }
+    wszystkie_statusy: dict[str, int] = defaultdict(int)
+    for statusy in statystyki.statusy.values():
+        for status, liczba in statusy.items():
+            wszystkie_statusy[status] += liczba
+    lacznie = _opis_endpointu(
+        [c for czasy in statystyki.czasy.values() for c in czasy],
+        sum(statystyki.bledy.values()), wszystkie_statusy, czas_s)
+    return {
+        "konfiguracja": konfiguracja,
+        "czas_s": round(czas_s, 3),
+        "endpointy": endpointy,
+        "lacznie": lacznie,
+    }
+
+
+def wypisz_podsumowanie(wynik: dict[str, Any]) -> None:
+    """
+    Wypisuje podsumowanie testu w formie tabeli.
+
+    :param wynik: Słownik zwrócony przez `podsumowanie`.
+    """
+    print(f"Czas testu: {wynik['czas_s']} s, "
+          f"klienci: {wynik['konfiguracja']['klienci']}")
+    print(f"{'endpoint':<24}{'liczba':>8}{'rps':>10}{'p50':>9}"
+          f"{'p95':>9}{'p99':>9}{'bledy %':>9}")
+    wiersze = list(wynik["endpointy"].items())
+    wiersze.append(("LACZNIE", wynik["lacznie"]))
+    for endpoint, opis in wiersze:
+        print(f"{endpoint:<24}{opis['liczba']:>8}{opis['rps']:>10.1f}"
+              f"{opis['p50_ms']:>9.2f}{opis['p95_ms']:>9.2f}"
+              f"{opis['p99_ms']:>9.2f}{opis['procent_bledow']:>9.2f}")
+
+
+@contextlib.contextmanager
+def _zmienna_srodowiskowa(nazwa: str, wartosc: str) -> Iterator[None]:
+    """
+    Tymczasowo ustawia zmienną środowiskową i przywraca jej poprzednią
+    wartość (lub ją usuwa) po wyjściu z bloku.
+    """
+    poprzednia = os.environ.get(nazwa)
+    os.environ[nazwa] = wartosc
+    try:
+        yield
+    finally:
+        if poprzednia is None:
+            os.environ.pop(nazwa, None)
+        else:
+            os.environ[nazwa] = poprzednia
+
+
+def _bez_wypisywania(*args, **kwargs) -> None:
+    pass
+
+
+@contextlib.contextmanager
+def podlaczony_serwer(url: str) -> Iterator[Any]:
+    """
+    Podłącza moduł `serwer` do bazy o podanym adresie na czas bloku.
+    Przy pierwszym imporcie `serwer` tworzy własny silnik z adresu
+    w BAZA_DANYCH_URL, dlatego importowany jest z bazą SQLite w pamięci,
+    a ten silnik jest od razu zamykany. Na czas bloku podmieniane są
+    `serwer.engine` i `serwer.SessionLocal` (tabele są tworzone,
+    cache czyszczony); po wyjściu przywracany jest poprzedni stan,
+    a silnik bloku zamykany, więc plik bazy można usunąć.
+
+    :param url: Adres bazy danych SQLAlchemy.
+    :return: Moduł `serwer` podłączony do bazy.
+    """
+    if 'serwer' not in sys.modules:
+        with _zmienna_srodowiskowa('BAZA_DANYCH_URL', 'sqlite://'):
+            import serwer
+        serwer.engine.dispose()
+    import serwer
+    from operacje import create_engine_sqlalchemy, stworz_tabele
+
+    with _zmienna_srodowiskowa('BAZA_DANYCH_URL', url):
+        engine = create_engine_sqlalchemy()
+    stworz_tabele(engine)
+    SessionLocal = scoped_session(sessionmaker(bind=engine))
+    poprzednie = (serwer.engine, serwer.SessionLocal)
+    serwer.engine, serwer.SessionLocal = engine, SessionLocal
+    serwer.cache.clear()
+    try:
+        yield serwer
+    finally:
+        serwer.engine, serwer.SessionLocal = poprzednie
+        serwer.cache.clear()
+        SessionLocal.remove()
+        engine.dispose()
+
+
+def _zasiej_baze(SessionLocal, ksiazki: int, do_usuniecia: int) -> list[int]:
+    """
+    Dodaje użytkownika testowego oraz książki. Zwraca identyfikatory
+    książek przeznaczonych do usuwania w trakcie testu.
+    """
+    from operacje import Ksiazka, Uzytkownik
+    with SessionLocal() as session:
+        session.add(Uzytkownik(login=LOGIN, haslo=HASLO))
+        session.add_all([
+            Ksiazka(autor=f"Autor {i}", tytul=f"Tytul {i}",
+                    rok_wydania=1900 + i % 120)
+            for i in range(ksiazki + do_usuniecia)])
+        session.commit()
+    return list(range(ksiazki + 1, ksiazki + do_usuniecia + 1))
+
+
+def _klient(port: int, koniec: float, udzial_zapisow: float,
+            liczba_ksiazek: int, do_usuniecia: list[int],
+            blokada_usuwania: threading.Lock, statystyki: Statystyki,
+            ziarno: int) -> None:
+    """
+    Pętla jednego klienta: losuje operację zgodnie z proporcją
+    odczytów i zapisów, wysyła żądanie i zapisuje jego czas.
+    """
+    losowanie = random.Random(ziarno)
+    polaczenie = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    dane = b64encode(f"{LOGIN}:{HASLO}".encode()).decode()
+    naglowki = {'Authorization': f'Basic {dane}',
+                'Accept-Encoding': 'gzip'}
+    while time.perf_counter() < koniec:
+        cialo = None
+        id_ksiazki = losowanie.randint(1, liczba_ksiazek)
+        if losowanie.random() >= udzial_zapisow:
+            if losowanie.random() < 0.3:
+                endpoint, metoda, sciezka = 'GET /ksiazki', 'GET', '/ksiazki'
+            else:
+                endpoint, metoda, sciezka = (
+                    'GET /ksiazka/<id>', 'GET', f'/ksiazka/{id_ksiazki}')
+        else:
+            rodzaj = losowanie.choice(('POST', 'PUT', 'DELETE'))
+            id_do_usuniecia = None
+            if rodzaj == 'DELETE':
+                with blokada_usuwania:
+                    if do_usuniecia:
+                        id_do_usuniecia = do_usuniecia.pop()
+            if id_do_usuniecia is not None:
+                endpoint, metoda, sciezka = (
+                    'DELETE /ksiazka/<id>', 'DELETE',
+                    f'/ksiazka/{id_do_usuniecia}')
+            elif rodzaj == 'PUT':
+                endpoint, metoda, sciezka = (
+                    'PUT /ksiazka/<id>', 'PUT', f'/ksiazka/{id_ksiazki}')
+                cialo = json.dumps({"tytul": f"Tytul {time.time_ns()}"})
+            else:
+                endpoint, metoda = 'POST /ksiazka', 'POST'
+                sciezka = f'/ksiazka/Autor/Tytul%20{ziarno}/2000'
+        wysylane = dict(naglowki)
+        if cialo is not None:
+            wysylane['Content-Type'] = 'application/json'
+        start = time.perf_counter()
+        try:
+            polaczenie.request(metoda, sciezka, body=cialo, headers=wysylane)
+            odpowiedz = polaczenie.getresponse()
+            odpowiedz.read()
+            status = str(odpowiedz.status)
+            blad = odpowiedz.status >= 400
+        except (OSError, http.client.HTTPException) as e:
+            polaczenie.close()
+            polaczenie = http.client.HTTPConnection(
+                '127.0.0.1', port, timeout=30)
+            status, blad = type(e).__name__, True
+        statystyki.zapisz(
+            endpoint, (time.perf_counter() - start) * 1000, status, blad)
+    polaczenie.close()
+
+
+def uruchom_test(klienci: int = 8, czas_s: float = 10.0,
+                 udzial_zapisow: float = 0.1, ksiazki: int = 1000,
+                 do_usuniecia: int = 1000,
+                 ziarno: int = 0) -> dict[str, Any]:
+    """
+    Uruchamia aplikację `serwer.app` na lokalnym porcie z bazą SQLite,
+    a następnie obciąża ją równoległymi klientami. Baza jest podłączana
+    przez `podlaczony_serwer`, więc funkcję można wywoływać wielokrotnie
+    w jednym procesie.
+
+    :param klienci: Liczba równoległych klientów.
+    :param czas_s: Czas trwania testu w sekundach.
+    :param udzial_zapisow: Udział operacji zapisu (POST/PUT/DELETE), 0-1.
+    :param ksiazki: Liczba książek odczytywanych i aktualizowanych w teście.
+    :param do_usuniecia: Liczba dodatkowych książek dostępnych dla DELETE.
+    :param ziarno: Ziarno generatora losowego (powtarzalny rozkład operacji).
+    :return: Podsumowanie testu (patrz `podsumowanie`).
+    """
+    konfiguracja = {
+        "klienci": klienci, "czas_s": czas_s,
+        "udzial_zapisow": udzial_zapisow, "ksiazki": ksiazki,
+        "do_usuniecia": do_usuniecia, "ziarno": ziarno,
+    }
+    with tempfile.TemporaryDirectory() as katalog:
+        sciezka_bazy = os.path.join(katalog, 'obciazenie.db')
+        url = f'sqlite:///{sciezka_bazy}?timeout=30'
+        with podlaczony_serwer(url) as serwer:
+            ids_do_usuniecia = _zasiej_baze(
+                serwer.SessionLocal, ksiazki, do_usuniecia)
+            serwer_http = make_server(
+                '127.0.0.1', 0, serwer.app, threaded=True,
+                request_handler=_CichyHandler)
+            watek_serwera = threading.Thread(
+                target=serwer_http.serve_forever, daemon=True)
+            watek_serwera.start()
+
+            statystyki = Statystyki()
+            blokada_usuwania = threading.Lock()
+            start = time.perf_counter()
+            koniec = start + czas_s
+            watki = [
+                threading.Thread(target=_klient, args=(
+                    serwer_http.server_port, koniec, udzial_zapisow,
+                    ksiazki, ids_do_usuniecia, blokada_usuwania,
+                    statystyki, ziarno + i))
+                for i in range(klienci)]
+            # Komunikaty widoków (print) wyciszone tylko w module serwer.
+            serwer.print = _bez_wypisywania
+            try:
+                for watek in watki:
+                    watek.start()
+                for watek in watki:
+                    watek.join()
+            finally:
+                del serwer.print
+            trwanie = time.perf_counter() - start
+
+            serwer_http.shutdown()
+            serwer_http.server_close()
+    return podsumowanie(statystyki, trwanie, konfiguracja)
+
+
+def stworz_parser() -> argparse.ArgumentParser:
+    """
+    Tworzy parser argumentów testu obciążeniowego.
+    """
+    parser = argparse.ArgumentParser(
+        description='Test obciazeniowy API przyjacielskich wypozyczen')
+    parser.add_argument('--klienci', type=int, default=8,
+                        help='Liczba rownoleglych klientow')
+    parser.add_argument('--czas', type=float, default=10.0,
+                        help='Czas trwania testu w sekundach')
+    parser.add_argument('--zapisy', type=float, default=0.1,
+                        help='Udzial operacji zapisu (0-1)')
+    parser.add_argument('--ksiazki', type=int, default=1000,
+                        help='Liczba ksiazek w bazie testowej')
+    parser.add_argument('--do_usuniecia', type=int, default=1000,
+                        help='Liczba dodatkowych ksiazek dla DELETE')
+    parser.add_argument('--ziarno', type=int, default=0,
+                        help='Ziarno generatora losowego')
+    parser.add_argument('--json', help='Plik, do ktorego zapisac wynik JSON')
+    return parser
+
+
+def main() -> None:
+    args = stworz_parser().parse_args()
+    wynik = uruchom_test(
+        klienci=args.klienci, czas_s=args.czas, udzial_zapisow=args.zapisy,
+        ksiazki=args.ksiazki, do_usuniecia=args.do_usuniecia,
+        ziarno=args.ziarno)
+    wypisz_podsumowanie(wynik)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(wynik, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,38 @@
 from __future__ import annotations
 from datetime import datetime
+import hashlib
 import json
-from sqlalchemy import CheckConstraint, ForeignKeyConstraint
+from sqlalchemy import CheckConstraint, ForeignKeyConstraint, Index
 from sqlalchemy import create_engine, Column, Integer, ForeignKey, String
+from sqlalchemy import delete, insert, inspect, select, text, update
 from sqlalchemy.orm import DeclarativeBase, relationship
 import argparse
+import os
+from collections import Counter
+from typing import Any, Iterator
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from wolne_zapytania import wlacz_z_ustawien_srodowiska
 
 
 def create_engine_sqlalchemy() -> Engine:
     """
     Tworzy silnik do połączenia z bazą danych SQL Server.
+    Adres bazy można nadpisać zmienną środowiskową BAZA_DANYCH_URL
+    (np. 'sqlite:///biblioteka.db'). Jeśli ustawiono zmienną
+    WOLNE_ZAPYTANIA_PROG_MS, do silnika podłączany jest log wolnych zapytań.
 
     :return: Obiekt silnika SQLAlchemy (engine).
     """
     server = 'LAPTOP-KS5QVHTA\\SQLEXPRESS'
     database = 'Python'
-    engine = create_engine(
+    url = os.environ.get(
+        'BAZA_DANYCH_URL',
         f'mssql+pyodbc://{server}/{database}?'
         f'driver=ODBC+Driver+17+for+SQL+Server'
     )
+    engine = create_engine(url)
+    wlacz_z_ustawien_srodowiska(engine)
     return engine
 
 
@@ -141,6 +154,9 @@ class Wypozyczenie(Base):
     :param przyjaciel_id: Id przyjaciela powiązanego z wypożyczeniem.
     :param data_wypozyczenia: Data wypożyczenia książki
     (domyślnie bieżąca data).
+    :param data_zwrotu: Data i czas zwrotu książki (NULL dla aktywnych
+    wypożyczeń). Częściowy unikalny indeks obejmuje tylko aktywne
+    wypożyczenia, więc baza dopuszcza jedno aktywne wypożyczenie książki.
     """
     __tablename__ = 'Wypozyczenia'
     id: Column[int] = Column(Integer, primary_key=True)
@@ -150,12 +166,19 @@ class Wypozyczenie(Base):
         'Przyjaciele.id'), nullable=False)
     data_wypozyczenia: Column[str] = Column(
         String, nullable=False, default=datetime.now().strftime("%Y-%m-%d"))
+    data_zwrotu: Column[str] = Column(String, nullable=True)
 
     ksiazka = relationship('Ksiazka', back_populates='wypozyczenia')
     przyjaciel = relationship('Przyjaciel', back_populates='wypozyczenia')
 
-    __table_args__ = (ForeignKeyConstraint(['przyjaciel_id'], [
-                      'Przyjaciele.id'], name='fk_przyjaciel_exists'),)
+    __table_args__ = (
+        ForeignKeyConstraint(['przyjaciel_id'], [
+            'Przyjaciele.id'], name='fk_przyjaciel_exists'),
+        Index('ix_wypozyczenia_aktywne', 'ksiazka_id', unique=True,
+              sqlite_where=data_zwrotu.is_(None),
+              mssql_where=data_zwrotu.is_(None),
+              postgresql_where=data_zwrotu.is_(None)),
+    )
 
     def __repr__(self):
         return (
@@ -163,6 +186,7 @@ class Wypozyczenie(Base):
             f"id={self.id}, ksiazka_id={self.ksiazka_id}, "
             f"przyjaciel_id={self.przyjaciel_id}, "
             f"data_wypozyczenia='{self.data_wypozyczenia}', "
+            f"data_zwrotu={self.data_zwrotu!r})"
         )
 
 
@@ -173,6 +197,53 @@ def stworz_tabele(engine: Engine) -> None:
     :param engine: Obiekt silnika SQLAlchemy.
     """
     Base.metadata.create_all(engine)
+    zaktualizuj_schemat(engine)
+
+
+def zaktualizuj_schemat(engine: Engine) -> None:
+    """
+    Dodaje do istniejącej tabeli 'Wypozyczenia' kolumnę 'data_zwrotu'
+    oraz częściowy unikalny indeks aktywnych wypożyczeń, jeśli baza
+    została utworzona przed ich wprowadzeniem (create_all nie zmienia
+    istniejących tabel). Wcześniejsza, nieunikalna wersja indeksu
+    jest zastępowana.
+
+    :param engine: Obiekt silnika SQLAlchemy.
+    """
+    tabela = Wypozyczenie.__table__
+    inspektor = inspect(engine)
+    kolumny = {k['name'] for k in inspektor.get_columns(tabela.name)}
+    if 'data_zwrotu' not in kolumny:
+        preparer = engine.dialect.identifier_preparer
+        typ = tabela.c.data_zwrotu.type.compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"ALTER TABLE {preparer.format_table(tabela)} "
+                f"ADD {preparer.quote('data_zwrotu')} {typ} NULL"))
+        print("Dodano kolumne data_zwrotu do tabeli Wypozyczenia.")
+    istniejace = {i['name']: i for i in inspektor.get_indexes(tabela.name)}
+    for indeks in tabela.indexes:
+        stary = istniejace.get(indeks.name)
+        if stary is not None and bool(stary['unique']) != indeks.unique:
+            indeks.drop(engine)
+            stary = None
+        if stary is None:
+            indeks.create(engine)
+
+
+def ksiazka_do_slownika(ksiazka: Ksiazka) -> dict[str, Any]:
+    """
+    Zamienia obiekt książki na słownik (format plików JSON i API).
+
+    :param ksiazka: Obiekt książki.
+    :return: Słownik z polami id, autor, tytul i rok_wydania.
+    """
+    return {
+        "id": ksiazka.id,
+        "autor": ksiazka.autor,
+        "tytul": ksiazka.tytul,
+        "rok_wydania": ksiazka.rok_wydania
+    }
 
 
 def dodaj_ksiazke(
@@ -193,8 +264,7 @@ def dodaj_ksiazke(
     session.commit()
     print(f"Ksiazka {ksiazka.tytul} zostala dodana.")
     ksiazki = session.query(Ksiazka).all()
-    ksiazki_json = [{"id": k.id, "autor": k.autor, "tytul": k.tytul,
-                     "rok_wydania": k.rok_wydania} for k in ksiazki]
+    ksiazki_json = [ksiazka_do_slownika(k) for k in ksiazki]
     with open('ksiazki.json', 'w', encoding='utf-8') as f:
         json.dump(ksiazki_json, f, ensure_ascii=False, indent=4)
 
@@ -237,74 +307,130 @@ def dodaj_uzytkownika(session, login: Column[str], haslo: Column[str]) -> None:
     with open('uzytkownicy.json', 'w', encoding='utf-8') as f:
         json.dump(uzytkownicy_json, f, ensure_ascii=False, indent=4)
 
+def czy_wypozyczona(session, ksiazka_id: Column[int]) -> bool:
+    """
+    Sprawdza, czy książka jest aktualnie wypożyczona. Przeszukiwane są
+    tylko aktywne wypożyczenia (częściowy indeks 'ix_wypozyczenia_aktywne').
+
+    :param session: Sesja bazy danych SQLAlchemy.
+    :param ksiazka_id: ID książki.
+    :return: True, jeśli książka ma niezakończone wypożyczenie.
+    """
+    zapytanie = select(Wypozyczenie.id).where(
+        Wypozyczenie.ksiazka_id == ksiazka_id,
+        Wypozyczenie.data_zwrotu.is_(None)).limit(1)
+    return session.execute(zapytanie).first() is not None
+
+
+def zapisz_aktywne_wypozyczenia(session) -> None:
+    """
+    Zapisuje aktywne (niezwrócone) wypożyczenia do pliku JSON.
+
+    :param session: Sesja bazy danych SQLAlchemy.
+    """
+    wypozyczenia = session.query(Wypozyczenie).filter(
+        Wypozyczenie.data_zwrotu.is_(None)).order_by(Wypozyczenie.id).all()
+    wypozyczenia_json = [
+        {
+            "id": w.id,
+            "ksiazka_id": w.ksiazka_id,
+            "przyjaciel_id": w.przyjaciel_id,
+            "data_wypozyczenia": w.data_wypozyczenia
+        }
+        for w in wypozyczenia]
+    with open('wypozyczenia.json', 'w', encoding='utf-8') as f:
+        json.dump(wypozyczenia_json, f, ensure_ascii=False, indent=4)
+
+
 def wypozycz_ksiazke(
         session,
         ksiazka_id: Column[int],
         przyjaciel_id: Column[int]) -> None:
     """
     Wypożycza książkę przyjacielowi, jeśli książka nie jest już wypożyczona.
+    Unikalny indeks aktywnych wypożyczeń odrzuca drugie wypożyczenie
+    także wtedy, gdy dwa wywołania równocześnie przejdą sprawdzenie.
 
     :param session: Sesja bazy danych SQLAlchemy.
     :param ksiazka_id: ID książki do wypożyczenia.
     :param przyjaciel_id: ID przyjaciela wypożyczającego książkę.
     """
-    czy_wypozyczona = session.query(Wypozyczenie).filter_by(
-        ksiazka_id=ksiazka_id).first()
-    if czy_wypozyczona:
+    if czy_wypozyczona(session, ksiazka_id):
         ksiazka = session.get(Ksiazka, ksiazka_id)
         print(f"Ksiazka '{ksiazka.tytul}' jest juz wypozyczona.")
         return
     wypozyczenie = Wypozyczenie(
         ksiazka_id=ksiazka_id, przyjaciel_id=przyjaciel_id)
     session.add(wypozyczenie)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        if not czy_wypozyczona(session, ksiazka_id):
+            raise
+        ksiazka = session.get(Ksiazka, ksiazka_id)
+        print(f"Ksiazka '{ksiazka.tytul}' jest juz wypozyczona.")
+        return
     ksiazka = session.get(Ksiazka, ksiazka_id)
     przyjaciel = session.get(Przyjaciel, przyjaciel_id)
 
     print(
         f"Wypozyczono ksiazke: {ksiazka.tytul} "
         f"od {przyjaciel.imie} ({przyjaciel.email})")
-    wypozyczenia = session.query(Wypozyczenie).all()
-    wypozyczenia_json = [
-        {
-            "id": w.id,
-            "ksiazka_id": w.ksiazka_id,
-            "przyjaciel_id": w.przyjaciel_id,
-            "data_wypozyczenia": w.data_wypozyczenia
-        }
-        for w in wypozyczenia]
-    with open('wypozyczenia.json', 'w', encoding='utf-8') as f:
-        json.dump(wypozyczenia_json, f, ensure_ascii=False, indent=4)
+    zapisz_aktywne_wypozyczenia(session)
 
 
 def oddaj_ksiazke(session, ksiazka_id: Column[int]) -> None:
     """
-    Przyjmuje sesję bazy danych oraz identyfikator książki,
-    a następnie sprawdza, czy książka jest wypożyczona.
-    Jeśli tak, dokonuje zwrotu książki, aktualizuje bazę
-    danych oraz plik JSON z wypożyczeniami.
+    Przyjmuje sesję bazy danych oraz identyfikator książki
+    i zamyka jej aktywne wypożyczenie, ustawiając datę zwrotu.
+    Zamknięcie odbywa się jednym warunkowym UPDATE, więc dwa
+    równoczesne zwroty nie zamkną tego samego wypożyczenia dwukrotnie.
+    Zakończone wypożyczenie pozostaje w bazie jako historia,
+    a plik JSON zawiera tylko aktywne wypożyczenia.
 
     :param session: Sesja bazy danych SQLAlchemy.
     :param ksiazka_id: Identyfikator książki do zwrotu.
     """
-    czy_wypozyczona = session.query(Wypozyczenie).filter_by(
-        ksiazka_id=ksiazka_id).first()
-    if czy_wypozyczona:
-        session.commit()
+    wynik = session.execute(
+        update(Wypozyczenie)
+        .where(Wypozyczenie.ksiazka_id == ksiazka_id,
+               Wypozyczenie.data_zwrotu.is_(None))
+        .values(data_zwrotu=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    session.commit()
+    if wynik.rowcount:
         ksiazka = session.get(Ksiazka, ksiazka_id)
         print(f"Oddano ksiazke: {ksiazka.tytul}")
-        with open('wypozyczenia.json', 'r', encoding='utf-8') as f:
-            wypozyczenia_json = json.load(f)
-
-        wypozyczenia_json = [
-            w for w in wypozyczenia_json if w["ksiazka_id"] != ksiazka_id]
-
-        with open('wypozyczenia.json', 'w', encoding='utf-8') as f:
-            json.dump(wypozyczenia_json, f, ensure_ascii=False, indent=4)
+        zapisz_aktywne_wypozyczenia(session)
     else:
         print("Ksiazka nie jest aktualnie wypozyczona.")
 
 
+def historia_wypozyczen(
+        session,
+        rozmiar_partii: int = 1000) -> Iterator[list[Wypozyczenie]]:
+    """
+    Zwraca zakończone wypożyczenia partiami, stronicując po kluczu
+    głównym (bez OFFSET), dzięki czemu koszt każdej partii jest stały.
+
+    :param session: Sesja bazy danych SQLAlchemy.
+    :param rozmiar_partii: Maksymalna liczba wypożyczeń w jednej partii.
+    :return: Iterator list zakończonych wypożyczeń.
+    """
+    ostatnie_id = 0
+    while True:
+        partia = session.scalars(
+            select(Wypozyczenie)
+            .where(Wypozyczenie.data_zwrotu.is_not(None),
+                   Wypozyczenie.id > ostatnie_id)
+            .order_by(Wypozyczenie.id)
+            .limit(rozmiar_partii)).all()
+        if not partia:
+            return
+        yield list(partia)
+        ostatnie_id = partia[-1].id
+
+
 def lista_ksiazek(session) -> None:
     """
     Pobiera listę wszystkich książek z bazy danych i wypisuje je na konsolę.
@@ -363,12 +489,239 @@ def zaladuj_dane_z_plikow(session) -> None:
         dodaj_uzytkownika(session, uzytkownik["login"], uzytkownik["haslo"])
 
 
+ROZMIAR_PARTII_SYNCHRONIZACJI = 500
+
+
+def _skrot_rekordu(rekord: dict[str, Any], pola: tuple[str, ...]) -> str:
+    """
+    Liczy skrót SHA-1 z wartości podanych pól rekordu.
+
+    :param rekord: Rekord z pliku JSON lub wiersz z bazy danych.
+    :param pola: Nazwy porównywanych pól.
+    :return: Skrót w postaci szesnastkowej.
+    """
+    wartosci = json.dumps([rekord.get(p) for p in pola], ensure_ascii=False)
+    return hashlib.sha1(wartosci.encode('utf-8')).hexdigest()
+
+
+def _usun_wiersze(session, model, ids: list[int],
+                  odwolania: Column[int] | None = None) -> int:
+    """
+    Usuwa partiami wiersze o podanych identyfikatorach. Wiersze,
+    do których odwołują się wypożyczenia (także zakończone, które
+    pozostają w bazie jako historia), są pomijane i zgłaszane,
+    aby nie naruszyć klucza obcego.
+
+    :param session: Sesja bazy danych SQLAlchemy.
+    :param model: Klasa modelu (tabeli), z której usuwane są wiersze.
+    :param ids: Identyfikatory wierszy do usunięcia.
+    :param odwolania: Kolumna klucza obcego wskazująca na model
+    (np. Wypozyczenie.ksiazka_id) lub None.
+    :return: Liczba usuniętych wierszy.
+    """
+    usuniete = 0
+    pominiete = []
+    for i in range(0, len(ids), ROZMIAR_PARTII_SYNCHRONIZACJI):
+        partia = ids[i:i + ROZMIAR_PARTII_SYNCHRONIZACJI]
+        if odwolania is not None:
+            powiazane = set(session.scalars(
+                select(odwolania).where(odwolania.in_(partia)).distinct()))
+            pominiete.extend(x for x in partia if x in powiazane)
+            partia = [x for x in partia if x not in powiazane]
+        if partia:
+            usuniete += session.execute(
+                delete(model).where(model.id.in_(partia))).rowcount
+    if pominiete:
+        przyklad = ', '.join(str(x) for x in pominiete[:10])
+        if len(pominiete) > 10:
+            przyklad += ', ...'
+        print(f"{model.__tablename__}: pominieto {len(pominiete)} "
+              f"wierszy powiazanych z wypozyczeniami (id: {przyklad}).")
+    return usuniete
+
+
+def _zamknij_wypozyczenia(session, ids: list[int]) -> int:
+    """
+    Zamyka (zamiast usuwać) aktywne wypożyczenia, których nie ma już
+    w pliku - plik zawiera tylko aktywne wypożyczenia, a zakończone
+    pozostają w bazie jako historia.
+
+    :return: Liczba zamkniętych wypożyczeń.
+    """
+    data_zwrotu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    zamkniete = 0
+    for i in range(0, len(ids), ROZMIAR_PARTII_SYNCHRONIZACJI):
+        partia = ids[i:i + ROZMIAR_PARTII_SYNCHRONIZACJI]
+        zamkniete += session.execute(
+            update(Wypozyczenie)
+            .where(Wypozyczenie.id.in_(partia),
+                   Wypozyczenie.data_zwrotu.is_(None))
+            .values(data_zwrotu=data_zwrotu)).rowcount
+    return zamkniete
+
+
+def _zaplanuj_synchronizacje(
+        session,
+        model,
+        rekordy: list[dict[str, Any]],
+        pola: tuple[str, ...],
+        klucz_naturalny: str | None = None
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[int]]:
+    """
+    Porównuje rekordy z pliku z wierszami tabeli i wyznacza potrzebne
+    wstawienia, aktualizacje i usunięcia. Rekordy są dopasowywane
+    po 'id', a rekordy bez 'id' - po kluczu naturalnym. Niezmienione
+    wiersze (ten sam skrót pól) są pomijane.
+
+    :param session: Sesja bazy danych SQLAlchemy.
+    :param model: Klasa modelu (tabeli) do synchronizacji.
+    :param rekordy: Rekordy wczytane z pliku JSON.
+    :param pola: Nazwy pól porównywanych i aktualizowanych.
+    :param klucz_naturalny: Pole unikalne (np. 'email') używane, gdy
+    rekord nie ma 'id'.
+    :return: Wiersze do wstawienia, wiersze do aktualizacji
+    oraz identyfikatory wierszy, których nie ma w pliku.
+    """
+    kolumny = {'id': model.id}
+    kolumny.update((p, getattr(model, p)) for p in pola)
+    if klucz_naturalny is not None:
+        kolumny[klucz_naturalny] = getattr(model, klucz_naturalny)
+    w_bazie = {}
+    po_kluczu = {}
+    for wiersz in session.execute(select(*kolumny.values())):
+        mapa = wiersz._mapping
+        w_bazie[mapa['id']] = _skrot_rekordu(mapa, pola)
+        if klucz_naturalny is not None:
+            po_kluczu[mapa[klucz_naturalny]] = mapa['id']
+
+    dopasowane = set()
+    nowe = []
+    zmienione = []
+    for rekord in rekordy:
+        id_rekordu = rekord.get('id')
+        if id_rekordu is None and klucz_naturalny is not None:
+            id_rekordu = po_kluczu.get(rekord[klucz_naturalny])
+        wartosci = {p: rekord.get(p) for p in pola}
+        if id_rekordu is not None:
+            dopasowane.add(id_rekordu)
+        if id_rekordu not in w_bazie:
+            if id_rekordu is not None:
+                wartosci['id'] = id_rekordu
+            nowe.append(wartosci)
+        elif w_bazie[id_rekordu] != _skrot_rekordu(rekord, pola):
+            zmienione.append({'id': id_rekordu, **wartosci})
+
+    do_usuniecia = [i for i in w_bazie if i not in dopasowane]
+    return nowe, zmienione, do_usuniecia
+
+
+def _zapisz_zmiany(session, model, nowe: list[dict[str, Any]],
+                   zmienione: list[dict[str, Any]]) -> None:
+    """
+    Wykonuje zbiorczo aktualizacje, a następnie wstawienia.
+    """
+    if zmienione:
+        session.execute(update(model), zmienione)
+    if nowe:
+        session.execute(insert(model), nowe)
+
+
+def _sprawdz_rekordy_do_synchronizacji(
+        ksiazki: list[dict[str, Any]],
+        wypozyczenia: list[dict[str, Any]]) -> None:
+    """
+    Sprawdza rekordy przed synchronizacją. Książki i wypożyczenia nie mają
+    klucza naturalnego, więc rekord bez 'id' byłby przy każdej
+    synchronizacji wstawiany ponownie. Plik wypożyczeń zawiera tylko
+    aktywne wypożyczenia, więc każda książka może wystąpić w nim raz.
+
+    :param ksiazki: Rekordy z pliku 'ksiazki.json'.
+    :param wypozyczenia: Rekordy z pliku 'wypozyczenia.json'.
+    :raises ValueError: Jeśli rekord nie ma 'id' lub książka jest
+    wypożyczona więcej niż raz.
+    """
+    for plik, rekordy in (('ksiazki.json', ksiazki),
+                          ('wypozyczenia.json', wypozyczenia)):
+        bez_id = sum(1 for rekord in rekordy if rekord.get('id') is None)
+        if bez_id:
+            raise ValueError(
+                f"{plik}: {bez_id} rekordow bez pola 'id'.")
+    licznik = Counter(w['ksiazka_id'] for w in wypozyczenia)
+    powtorzone = sorted(k for k, n in licznik.items() if n > 1)
+    if powtorzone:
+        raise ValueError(
+            f"wypozyczenia.json: ksiazki wypozyczone wiecej niz raz "
+            f"(ksiazka_id: {', '.join(str(k) for k in powtorzone[:10])}).")
+
+
+def synchronizuj_dane_z_plikow(session) -> dict[str, tuple[int, int, int]]:
+    """
+    Przyrostowo synchronizuje bazę danych z plikami JSON. W odróżnieniu
+    od `zaladuj_dane_z_plikow` może być wywoływana wielokrotnie:
+    rekordy są dopasowywane po 'id', a rekordy bez 'id' - przyjaciele
+    po 'email', a użytkownicy po 'login' (zmiana adresu email lub loginu
+    przy tym samym 'id' jest zwykłą aktualizacją). Wiersze, których nie ma
+    w pliku, są usuwane (wypożyczenia - zamykane, jako pierwsze), z wyjątkiem
+    książek i przyjaciół powiązanych z wypożyczeniami, które są pomijane.
+    Całość wykonywana jest w jednej transakcji.
+
+    :param session: Sesja bazy danych SQLAlchemy.
+    :return: Słownik nazwa tabeli -> (dodane, zmienione, usunięte).
+    :raises ValueError: Jeśli książka lub wypożyczenie nie ma 'id'
+    albo książka jest w pliku wypożyczona więcej niż raz.
+    """
+    with open('ksiazki.json', 'r', encoding='utf-8') as f:
+        ksiazki = json.load(f)
+    with open('przyjaciele.json', 'r', encoding='utf-8') as f:
+        przyjaciele = json.load(f)
+    with open('wypozyczenia.json', 'r', encoding='utf-8') as f:
+        wypozyczenia = json.load(f)
+    with open('uzytkownicy.json', 'r', encoding='utf-8') as f:
+        uzytkownicy = json.load(f)
+    _sprawdz_rekordy_do_synchronizacji(ksiazki, wypozyczenia)
+
+    pola_wypozyczen = ('ksiazka_id', 'przyjaciel_id', 'data_wypozyczenia',
+                       'data_zwrotu')
+    nowe_wyp, zmienione_wyp, do_zamkniecia = _zaplanuj_synchronizacje(
+        session, Wypozyczenie, wypozyczenia, pola_wypozyczen)
+    aktywne = set(session.scalars(
+        select(Wypozyczenie.id).where(Wypozyczenie.data_zwrotu.is_(None))))
+    do_zamkniecia = [i for i in do_zamkniecia if i in aktywne]
+    zamkniete = _zamknij_wypozyczenia(session, do_zamkniecia)
+
+    wynik = {}
+    for model, rekordy, pola, klucz_naturalny, odwolania in (
+            (Ksiazka, ksiazki, ('autor', 'tytul', 'rok_wydania'),
+             None, Wypozyczenie.ksiazka_id),
+            (Przyjaciel, przyjaciele, ('imie', 'email'),
+             'email', Wypozyczenie.przyjaciel_id),
+            (Uzytkownik, uzytkownicy, ('login', 'haslo'), 'login', None)):
+        nowe, zmienione, do_usuniecia = _zaplanuj_synchronizacje(
+            session, model, rekordy, pola, klucz_naturalny)
+        usuniete = _usun_wiersze(session, model, do_usuniecia, odwolania)
+        _zapisz_zmiany(session, model, nowe, zmienione)
+        wynik[model.__tablename__] = (len(nowe), len(zmienione), usuniete)
+
+    _zapisz_zmiany(session, Wypozyczenie, nowe_wyp, zmienione_wyp)
+    wynik[Wypozyczenie.__tablename__] = (
+        len(nowe_wyp), len(zmienione_wyp), zamkniete)
+    session.commit()
+    for tabela, (dodane, zmienione, usuniete) in wynik.items():
+        print(f"{tabela}: dodano {dodane}, zmieniono {zmienione}, "
+              f"usunieto {usuniete}.")
+    return wynik
+
+
 def stworz_parser() -> argparse.ArgumentParser:
     """
     Tworzy parser argumentów wykorzystywany w aplikacji
     """
     parser = argparse.ArgumentParser(
         description='Przyjacielskie wypozyczenia ksiazek')
+    parser.add_argument(
+        '--pelne_ladowanie', action='store_true',
+        help='Usun tabele i zaladuj dane z plikow od nowa '
+             '(domyslnie przyrostowa synchronizacja)')
     subparsers = parser.add_subparsers(
         dest='command', help='Dostepne polecenia')
 
@@ -414,4 +767,13 @@ def stworz_parser() -> argparse.ArgumentParser:
     wypisz_przyjaciol_parser = subparsers.add_parser(
         'lista_przyjaciol', help='Wyswietl wszystkich przyjaciol')
 
+    wolne_zapytania_parser = subparsers.add_parser(
+        'wolne_zapytania', help='Wyswietl najwolniejsze zapytania z logu')
+    wolne_zapytania_parser.add_argument(
+        '--plik', default='wolne_zapytania.jsonl',
+        help='Plik logu wolnych zapytan')
+    wolne_zapytania_parser.add_argument(
+        '--limit', type=int, default=10,
+        help='Liczba wyswietlanych zapytan')
+
     return parser
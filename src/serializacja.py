@@ -0,0 +1,55 @@
+from __future__ import annotations
+import gzip
+import json
+from typing import Any, NamedTuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def do_json(dane: Any) -> bytes:
+    """
+    Serializuje dane do JSON (UTF-8). Używa biblioteki orjson,
+    jeśli jest zainstalowana, w przeciwnym razie modułu json.
+
+    :param dane: Dane do serializacji (słowniki, listy, typy proste).
+    :return: Zserializowane dane w postaci bajtów.
+    """
+    if orjson is not None:
+        return orjson.dumps(dane)
+    return json.dumps(
+        dane, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class WpisOdpowiedzi(NamedTuple):
+    """
+    Gotowa do wysłania odpowiedź JSON przechowywana w cache.
+
+    :param status: Kod statusu HTTP.
+    :param cialo: Zserializowane ciało odpowiedzi.
+    :param cialo_gzip: Ciało skompresowane gzipem lub None,
+    jeśli jest mniejsze od progu kompresji.
+    """
+    status: int
+    cialo: bytes
+    cialo_gzip: bytes | None
+
+
+def przygotuj_wpis(dane: Any, status: int,
+                   prog_kompresji: int) -> WpisOdpowiedzi:
+    """
+    Serializuje dane i, jeśli ciało przekracza próg, od razu je kompresuje,
+    aby kolejne odczyty z cache nie powtarzały tej pracy.
+
+    :param dane: Dane do serializacji.
+    :param status: Kod statusu HTTP.
+    :param prog_kompresji: Minimalny rozmiar ciała (w bajtach) do kompresji.
+    :return: Wpis odpowiedzi.
+    """
+    cialo = do_json(dane)
+    cialo_gzip = None
+    if len(cialo) >= prog_kompresji:
+        cialo_gzip = gzip.compress(cialo, compresslevel=6, mtime=0)
+    return WpisOdpowiedzi(status, cialo, cialo_gzip)
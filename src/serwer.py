@@ -1,15 +1,19 @@
 from flask import Response, make_response, request
 from flask.typing import ResponseReturnValue
-from flask import Flask, jsonify, request
+from flask import Flask, request
+from typing import Any
 from sqlalchemy import Column
 from sqlalchemy.orm import sessionmaker, scoped_session
 from operacje import create_engine_sqlalchemy, Ksiazka, Base, Uzytkownik
+from operacje import ksiazka_do_slownika
+from serializacja import WpisOdpowiedzi, przygotuj_wpis
 from functools import wraps, lru_cache, cache
 from flask_caching import Cache
 
 app = Flask(__name__)
 app.config['CACHE_TYPE'] = 'SimpleCache'
 app.config['CACHE_DEFAULT_TIMEOUT'] = 300
+app.config['PROG_KOMPRESJI'] = 1024
 cache = Cache(app)
 
 engine = create_engine_sqlalchemy()
@@ -29,6 +33,51 @@ def auth_required(f):
         return make_response("<h1>Access denied</h1>", 401, {'WWW-Authenticate': 'Basic realm="Login Required!"'})
     return decorated_function
 
+
+def odpowiedz_z_wpisu(wpis: WpisOdpowiedzi) -> Response:
+    """
+    Buduje odpowiedź JSON z gotowego wpisu. Skompresowane ciało jest
+    wysyłane, jeśli istnieje i klient akceptuje kodowanie gzip.
+    """
+    naglowki = {'Content-Type': 'application/json',
+                'Vary': 'Accept-Encoding'}
+    cialo = wpis.cialo
+    if wpis.cialo_gzip is not None and request.accept_encodings['gzip']:
+        cialo = wpis.cialo_gzip
+        naglowki['Content-Encoding'] = 'gzip'
+    return Response(cialo, status=wpis.status, headers=naglowki)
+
+
+def odpowiedz_json(dane: Any, status: int) -> Response:
+    """
+    Serializuje dane i zwraca odpowiedź JSON (z kompresją powyżej progu).
+    """
+    return odpowiedz_z_wpisu(
+        przygotuj_wpis(dane, status, app.config['PROG_KOMPRESJI']))
+
+
+def cached_json(timeout: int):
+    """
+    Zapisuje w cache zserializowaną (i skompresowaną) odpowiedź widoku,
+    który zwraca parę (dane, status). Cache trzyma oba warianty ciała,
+    więc kolejne odczyty nie serializują ani nie kompresują danych
+    ponownie. Zapisywane są tylko odpowiedzi ze statusem 200.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            klucz = f"json/{request.path}"
+            wpis = cache.get(klucz)
+            if wpis is None:
+                dane, status = f(*args, **kwargs)
+                wpis = przygotuj_wpis(
+                    dane, status, app.config['PROG_KOMPRESJI'])
+                if status == 200:
+                    cache.set(klucz, wpis, timeout=timeout)
+            return odpowiedz_z_wpisu(wpis)
+        return decorated_function
+    return decorator
+
 @app.route('/')
 @auth_required
 #@cache.cached(timeout=60)
@@ -49,27 +98,22 @@ def home() -> str:
 
 @app.route('/ksiazki', methods=['GET'])
 @auth_required
-@cache.cached(timeout=60)
-def get_all_ksiazki() -> ResponseReturnValue:
+@cached_json(timeout=60)
+def get_all_ksiazki() -> tuple[Any, int]:
     """
     Endpoint do pobierania listy wszystkich książek.
     :return: Lista książek w formacie JSON.
     """
     with SessionLocal() as session:
         ksiazki = session.query(Ksiazka).all()
-        ksiazki_list = [{
-            "id": ksiazka.id,
-            "autor": ksiazka.autor,
-            "tytul": ksiazka.tytul,
-            "rok_wydania": ksiazka.rok_wydania
-        } for ksiazka in ksiazki]
-        return jsonify(ksiazki_list), 200
+        ksiazki_list = [ksiazka_do_slownika(ksiazka) for ksiazka in ksiazki]
+        return ksiazki_list, 200
 
 
 @app.route('/ksiazka/<int:id>', methods=['GET'])
 @auth_required
-@cache.cached(timeout=60)
-def get_ksiazka(id: int) -> ResponseReturnValue:
+@cached_json(timeout=60)
+def get_ksiazka(id: int) -> tuple[Any, int]:
     """
     Endpoint do pobierania szczegółów konkretnej książki na podstawie jej ID.
     :param id: ID książki.
@@ -79,14 +123,9 @@ def get_ksiazka(id: int) -> ResponseReturnValue:
     with SessionLocal() as session:
         ksiazka = session.query(Ksiazka).filter_by(id=id).first()
         if ksiazka:
-            return jsonify({
-                "id": ksiazka.id,
-                "autor": ksiazka.autor,
-                "tytul": ksiazka.tytul,
-                "rok_wydania": ksiazka.rok_wydania
-            }), 200
+            return ksiazka_do_slownika(ksiazka), 200
         else:
-            return jsonify({"message": "Ksiazka nie istnieje."}), 404
+            return {"message": "Ksiazka nie istnieje."}, 404
 
 
 @app.route('/ksiazka/<int:id>', methods=['DELETE'])
@@ -103,9 +142,9 @@ def delete_ksiazka(id: int) -> ResponseReturnValue:
             session.delete(ksiazka)
             session.commit()
             print(f"Usunieto ksiazke: {ksiazka}")
-            return jsonify({'message': 'OK'}), 204
+            return odpowiedz_json({'message': 'OK'}, 204)
         else:
-            return jsonify({"message": "Ksiazka nie istnieje."}), 404
+            return odpowiedz_json({"message": "Ksiazka nie istnieje."}, 404)
 
 
 @app.route('/ksiazka/<string:autor>/<string:tytul>/<int:rok_wydania>',
@@ -126,7 +165,7 @@ def dodaj_ksiazke(
         session.add(ksiazka)
         session.commit()
         print(f"Dodano ksiazke: {ksiazka}")
-        return jsonify({'message': 'OK'}), 204
+        return odpowiedz_json({'message': 'OK'}, 204)
 
 
 @app.route('/ksiazka/<int:id>', methods=['PUT'])
@@ -150,12 +189,12 @@ def update_ksiazka(id: int) -> ResponseReturnValue:
                 ksiazka.rok_wydania = rok_wydania
                 session.commit()
                 print(f"Zaktualizowano ksiazke: {ksiazka}")
-                return jsonify({'message': 'OK'}), 204
+                return odpowiedz_json({'message': 'OK'}, 204)
             else:
-                return jsonify(
-                    {'message': 'Brak danych do aktualizacji.'}), 400
+                return odpowiedz_json(
+                    {'message': 'Brak danych do aktualizacji.'}, 400)
         else:
-            return jsonify({"message": "Ksiazka nie istnieje."}), 404
+            return odpowiedz_json({"message": "Ksiazka nie istnieje."}, 404)
 
 
 if __name__ == "__main__":
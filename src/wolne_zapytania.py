@@ -0,0 +1,267 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PLIK_LOGU = 'wolne_zapytania.jsonl'
+
+_KATALOG_ZRODEL = os.path.dirname(os.path.abspath(__file__))
+
+
+def _ksztalt_parametrow(parametry: Any, wiele: bool) -> str:
+    """
+    Opisuje kształt parametrów zapytania bez zapisywania ich wartości
+    (parametry mogą zawierać np. hasła użytkowników).
+
+    :param parametry: Parametry przekazane do kursora.
+    :param wiele: Czy zapytanie wykonano przez executemany.
+    :return: Tekstowy opis kształtu parametrów.
+    """
+    if wiele and _jest_lista_wierszy(parametry):
+        parametry = list(parametry)
+        if not parametry:
+            return "0x()"
+        return f"{len(parametry)}x{_ksztalt_parametrow(parametry[0], False)}"
+    if parametry is None:
+        return "()"
+    if isinstance(parametry, dict):
+        return "{" + ", ".join(sorted(str(k) for k in parametry)) + "}"
+    if isinstance(parametry, (list, tuple)):
+        return f"({len(parametry)})"
+    return f"<{type(parametry).__name__}>"
+
+
+def _jest_lista_wierszy(parametry: Any) -> bool:
+    """
+    Sprawdza, czy parametry executemany są listą wierszy. Przy
+    "insertmanyvalues" (SQLAlchemy 2.x) zdarzenie ma executemany=True,
+    ale parametry są jedną płaską krotką wartości.
+    """
+    if not isinstance(parametry, (list, tuple)) or not parametry:
+        return isinstance(parametry, (list, tuple))
+    return isinstance(parametry[0], (list, tuple, dict))
+
+
+def _funkcja_wywolujaca() -> str:
+    """
+    Szuka na stosie pierwszej ramki pochodzącej z kodu aplikacji
+    (katalog src), pomijając SQLAlchemy oraz ten moduł.
+
+    :return: Opis w postaci 'plik:linia:funkcja' lub '?'.
+    """
+    ramka = sys._getframe(1)
+    while ramka is not None:
+        plik = ramka.f_code.co_filename
+        if (not plik.startswith('<')
+                and os.path.dirname(os.path.abspath(plik)) == _KATALOG_ZRODEL
+                and os.path.abspath(plik) != os.path.abspath(__file__)):
+            return (f"{os.path.basename(plik)}:{ramka.f_lineno}:"
+                    f"{ramka.f_code.co_name}")
+        ramka = ramka.f_back
+    return "?"
+
+
+def _plan_zapytania(conn, statement: str, parametry: Any,
+                    wiele: bool) -> list[str] | None:
+    """
+    Pobiera wynik EXPLAIN QUERY PLAN dla zapytania (tylko SQLite).
+
+    :param conn: Połączenie SQLAlchemy, na którym wykonano zapytanie.
+    :param statement: Tekst zapytania.
+    :param parametry: Parametry zapytania.
+    :param wiele: Czy zapytanie wykonano przez executemany.
+    :return: Lista wierszy planu lub None, jeśli planu nie da się pobrać.
+    """
+    if conn.dialect.name != 'sqlite':
+        return None
+    if wiele and _jest_lista_wierszy(parametry):
+        parametry = next(iter(parametry), ())
+    kursor = conn.connection.dbapi_connection.cursor()
+    try:
+        kursor.execute(f"EXPLAIN QUERY PLAN {statement}", parametry or ())
+        return [str(wiersz[-1]) for wiersz in kursor.fetchall()]
+    except Exception as e:
+        logger.debug("Nie udalo sie pobrac planu zapytania: %s", e)
+        return None
+    finally:
+        kursor.close()
+
+
+class LogWolnychZapytan:
+    """
+    Rejestruje zapytania wykonywane przez silnik SQLAlchemy, których
+    czas wykonania przekracza zadany próg.
+
+    :param prog_ms: Próg czasu wykonania w milisekundach.
+    :param plan: Czy pobierać plan zapytania (EXPLAIN QUERY PLAN, SQLite).
+    :param plik: Ścieżka pliku JSONL, do którego dopisywane są wpisy
+    (None - wpisy trzymane tylko w pamięci).
+    :param maks_wpisow: Liczba ostatnich wpisów trzymanych w pamięci
+    (starsze są odrzucane, pełna historia trafia do pliku).
+    """
+
+    def __init__(self, prog_ms: float = 100.0, plan: bool = False,
+                 plik: str | None = PLIK_LOGU, maks_wpisow: int = 1000):
+        self.prog_ms = prog_ms
+        self.plan = plan
+        self.plik = plik
+        self.wpisy: deque[dict[str, Any]] = deque(maxlen=maks_wpisow)
+        self._blokada = threading.Lock()
+
+    def podlacz(self, engine: Engine) -> None:
+        """
+        Rejestruje nasłuchiwacze zdarzeń na podanym silniku.
+
+        :param engine: Obiekt silnika SQLAlchemy.
+        """
+        event.listen(engine, 'before_cursor_execute', self._przed)
+        event.listen(engine, 'after_cursor_execute', self._po)
+
+    def odlacz(self, engine: Engine) -> None:
+        """
+        Usuwa nasłuchiwacze zdarzeń z podanego silnika.
+
+        :param engine: Obiekt silnika SQLAlchemy.
+        """
+        event.remove(engine, 'before_cursor_execute', self._przed)
+        event.remove(engine, 'after_cursor_execute', self._po)
+
+    def _przed(self, conn, cursor, statement, parameters, context,
+               executemany) -> None:
+        conn.info['wolne_zapytania_start'] = time.perf_counter()
+
+    def _po(self, conn, cursor, statement, parameters, context,
+            executemany) -> None:
+        start = conn.info.pop('wolne_zapytania_start', None)
+        if start is None:
+            return
+        czas_ms = (time.perf_counter() - start) * 1000
+        if czas_ms < self.prog_ms:
+            return
+        try:
+            self._zapisz(conn, statement, parameters, executemany, czas_ms)
+        except Exception:
+            # Diagnostyka nie może przerwać wykonywanego zapytania.
+            logger.exception("Nie udalo sie zapisac wolnego zapytania")
+
+    def _zapisz(self, conn, statement, parameters, executemany,
+                czas_ms: float) -> None:
+        wpis = {
+            "zapytanie": " ".join(statement.split()),
+            "parametry": _ksztalt_parametrow(parameters, executemany),
+            "czas_ms": round(czas_ms, 3),
+            "wywolujacy": _funkcja_wywolujaca(),
+        }
+        if self.plan:
+            wpis["plan"] = _plan_zapytania(
+                conn, statement, parameters, executemany)
+        logger.warning("Wolne zapytanie (%.1f ms) w %s: %s",
+                       czas_ms, wpis["wywolujacy"], wpis["zapytanie"])
+        linia = json.dumps(wpis, ensure_ascii=False) + "\n"
+        with self._blokada:
+            self.wpisy.append(wpis)
+            if self.plik is not None:
+                with open(self.plik, 'a', encoding='utf-8') as f:
+                    f.write(linia)
+
+
+def wlacz_z_ustawien_srodowiska(engine: Engine) -> LogWolnychZapytan | None:
+    """
+    Włącza log wolnych zapytań, jeśli ustawiono zmienną środowiskową
+    WOLNE_ZAPYTANIA_PROG_MS. Zmienna WOLNE_ZAPYTANIA_PLAN=1 włącza
+    pobieranie planów, a WOLNE_ZAPYTANIA_PLIK zmienia plik logu.
+
+    :param engine: Obiekt silnika SQLAlchemy.
+    :return: Podłączony log lub None, jeśli log jest wyłączony.
+    """
+    prog = os.environ.get('WOLNE_ZAPYTANIA_PROG_MS')
+    if prog is None:
+        return None
+    log = LogWolnychZapytan(
+        prog_ms=float(prog),
+        plan=os.environ.get('WOLNE_ZAPYTANIA_PLAN') == '1',
+        plik=os.environ.get('WOLNE_ZAPYTANIA_PLIK', PLIK_LOGU))
+    log.podlacz(engine)
+    return log
+
+
+def wczytaj_log(plik: str = PLIK_LOGU) -> list[dict[str, Any]]:
+    """
+    Wczytuje wpisy zapisane w pliku logu wolnych zapytań.
+
+    :param plik: Ścieżka pliku JSONL.
+    :return: Lista wpisów (pusta, jeśli plik nie istnieje).
+    """
+    if not os.path.exists(plik):
+        return []
+    with open(plik, 'r', encoding='utf-8') as f:
+        return [json.loads(linia) for linia in f if linia.strip()]
+
+
+def najwolniejsze(wpisy: list[dict[str, Any]],
+                  limit: int = 10) -> list[dict[str, Any]]:
+    """
+    Grupuje wpisy według tekstu zapytania i zwraca te o największym
+    łącznym czasie wykonania.
+
+    :param wpisy: Wpisy logu wolnych zapytań.
+    :param limit: Maksymalna liczba zwracanych zapytań.
+    :return: Lista podsumowań posortowana malejąco po łącznym czasie.
+    """
+    grupy: dict[str, dict[str, Any]] = {}
+    for wpis in wpisy:
+        grupa = grupy.setdefault(wpis["zapytanie"], {
+            "zapytanie": wpis["zapytanie"],
+            "liczba": 0,
+            "laczny_czas_ms": 0.0,
+            "max_czas_ms": 0.0,
+            "parametry": set(),
+            "wywolujacy": set(),
+            "plan": None,
+        })
+        grupa["liczba"] += 1
+        grupa["laczny_czas_ms"] += wpis["czas_ms"]
+        grupa["parametry"].add(wpis["parametry"])
+        grupa["wywolujacy"].add(wpis["wywolujacy"])
+        if wpis["czas_ms"] >= grupa["max_czas_ms"]:
+            grupa["max_czas_ms"] = wpis["czas_ms"]
+            grupa["plan"] = wpis.get("plan") or grupa["plan"]
+    wynik = sorted(grupy.values(),
+                   key=lambda g: g["laczny_czas_ms"], reverse=True)
+    for grupa in wynik:
+        grupa["parametry"] = sorted(grupa["parametry"])
+        grupa["wywolujacy"] = sorted(grupa["wywolujacy"])
+    return wynik[:limit]
+
+
+def wypisz_najwolniejsze(plik: str = PLIK_LOGU, limit: int = 10) -> None:
+    """
+    Wypisuje na konsolę zapytania o największym łącznym czasie
+    wykonania zapisane w pliku logu.
+
+    :param plik: Ścieżka pliku JSONL.
+    :param limit: Maksymalna liczba wypisywanych zapytań.
+    """
+    wpisy = wczytaj_log(plik)
+    if not wpisy:
+        print(f"Brak wolnych zapytan w pliku {plik}.")
+        return
+    for i, grupa in enumerate(najwolniejsze(wpisy, limit), start=1):
+        print(
+            f"{i}. {grupa['laczny_czas_ms']:.1f} ms lacznie, "
+            f"{grupa['liczba']}x, max {grupa['max_czas_ms']:.1f} ms")
+        print(f"   {grupa['zapytanie']}")
+        print(f"   parametry: {', '.join(grupa['parametry'])}")
+        print(f"   wywolania: {', '.join(grupa['wywolujacy'])}")
+        if grupa["plan"]:
+            for wiersz in grupa["plan"]:
+                print(f"   plan: {wiersz}")
@@ -6,12 +6,21 @@ from operacje import create_engine_sqlalchemy, stworz_tabele
 from operacje import Base, stworz_parser, dodaj_ksiazke
 from operacje import dodaj_przyjaciela, wypozycz_ksiazke, oddaj_ksiazke
 from operacje import lista_ksiazek, lista_przyjaciol, zaladuj_dane_z_plikow
+from operacje import synchronizuj_dane_z_plikow
+from wolne_zapytania import wypisz_najwolniejsze
 from argparse import Namespace
 
 
 def main() -> None:
+    parser = stworz_parser()
+    args: Namespace = parser.parse_args()
+    if args.command == 'wolne_zapytania':
+        wypisz_najwolniejsze(args.plik, args.limit)
+        return
+
     engine = create_engine_sqlalchemy()
-    Base.metadata.drop_all(engine)
+    if args.pelne_ladowanie:
+        Base.metadata.drop_all(engine)
     stworz_tabele(engine)
     print("Tabele zostaly stworzone w MSSQL Server.")
     # with Session(engine) as session:
@@ -24,12 +33,12 @@ def main() -> None:
     #   lista_ksiazek(session)
     #   lista_przyjaciol(session)
     with Session(engine) as session:
-        zaladuj_dane_z_plikow(session)
+        if args.pelne_ladowanie:
+            zaladuj_dane_z_plikow(session)
+        else:
+            synchronizuj_dane_z_plikow(session)
         os.system('cls' if os.name == 'nt' else 'clear')
 
-        parser = stworz_parser()
-        args: Namespace = parser.parse_args()
-
         if args.command == 'api':
             url = 'http://127.0.0.1:5000'
             print(f"Przekierowywanie do API: {url}")
@@ -0,0 +1,50 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+from obciazenie import Statystyki, percentyl, podsumowanie, uruchom_test
+
+
+class TestObciazenie(unittest.TestCase):
+    def test_percentyl(self):
+        wartosci = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentyl(wartosci, 50), 50.0)
+        self.assertEqual(percentyl(wartosci, 95), 95.0)
+        self.assertEqual(percentyl(wartosci, 99), 99.0)
+        self.assertEqual(percentyl([3.0], 99), 3.0)
+        self.assertEqual(percentyl([], 50), 0.0)
+
+    def test_podsumowanie(self):
+        statystyki = Statystyki()
+        statystyki.zapisz('GET /ksiazki', 10.0, '200', False)
+        statystyki.zapisz('GET /ksiazki', 30.0, '500', True)
+        statystyki.zapisz('POST /ksiazka', 20.0, '204', False)
+        wynik = podsumowanie(statystyki, 2.0, {"klienci": 1})
+        ksiazki = wynik["endpointy"]["GET /ksiazki"]
+        self.assertEqual(ksiazki["liczba"], 2)
+        self.assertEqual(ksiazki["rps"], 1.0)
+        self.assertEqual(ksiazki["procent_bledow"], 50.0)
+        self.assertEqual(ksiazki["statusy"], {"200": 1, "500": 1})
+        self.assertEqual(wynik["lacznie"]["liczba"], 3)
+        self.assertEqual(wynik["lacznie"]["p50_ms"], 20.0)
+
+    def test_krotki_przebieg_end_to_end(self):
+        poprzedni_url = os.environ.get('BAZA_DANYCH_URL')
+        for ziarno in (0, 1):
+            wynik = uruchom_test(klienci=1, czas_s=0.3, udzial_zapisow=0.5,
+                                 ksiazki=5, do_usuniecia=5, ziarno=ziarno)
+            self.assertGreater(wynik["lacznie"]["liczba"], 0)
+            self.assertEqual(wynik["lacznie"]["bledy"], 0)
+        self.assertEqual(os.environ.get('BAZA_DANYCH_URL'), poprzedni_url)
+
+    def test_serwer_nie_wskazuje_usunietej_bazy(self):
+        import serwer
+        wynik = uruchom_test(klienci=1, czas_s=0.1, udzial_zapisow=0.0,
+                             ksiazki=2, do_usuniecia=0, ziarno=0)
+        self.assertGreater(wynik["lacznie"]["liczba"], 0)
+        self.assertNotIn('obciazenie.db', str(serwer.engine.url))
+        self.assertFalse(hasattr(serwer, 'print'))
+
+
+if __name__ == "__main__":
+    unittest.main()
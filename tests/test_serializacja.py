@@ -0,0 +1,40 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import gzip
+import json
+import unittest
+from unittest import mock
+import serializacja
+from operacje import Ksiazka, ksiazka_do_slownika
+from serializacja import do_json, przygotuj_wpis
+
+
+class TestSerializacja(unittest.TestCase):
+    def test_ksiazka_do_slownika(self):
+        ksiazka = Ksiazka(autor="Autor", tytul="Tytuł", rok_wydania=2020)
+        ksiazka.id = 1
+        self.assertEqual(ksiazka_do_slownika(ksiazka), {
+            "id": 1, "autor": "Autor", "tytul": "Tytuł", "rok_wydania": 2020})
+
+    def test_do_json_bez_orjson(self):
+        dane = [{"tytul": "Tytuł", "rok_wydania": 2020}]
+        with mock.patch.object(serializacja, 'orjson', None):
+            wynik = do_json(dane)
+        self.assertEqual(json.loads(wynik.decode('utf-8')), dane)
+        self.assertEqual(do_json(dane), wynik)
+
+    def test_kompresja_powyzej_progu(self):
+        dane = [{"id": i, "tytul": "Tytul"} for i in range(100)]
+        wpis = przygotuj_wpis(dane, 200, prog_kompresji=1024)
+        self.assertEqual(wpis.status, 200)
+        self.assertEqual(gzip.decompress(wpis.cialo_gzip), wpis.cialo)
+        self.assertLess(len(wpis.cialo_gzip), len(wpis.cialo))
+
+    def test_brak_kompresji_ponizej_progu(self):
+        wpis = przygotuj_wpis({"message": "OK"}, 204, prog_kompresji=1024)
+        self.assertIsNone(wpis.cialo_gzip)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import contextlib
+import gzip
+import json
+import tempfile
+import unittest
+from base64 import b64encode
+from unittest import mock
+from obciazenie import podlaczony_serwer
+from operacje import Ksiazka, Uzytkownik
+
+
+class TestSerwerJson(unittest.TestCase):
+    def setUp(self):
+        self.katalog = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(self.katalog.name, 'test.db')}"
+        self.stos = contextlib.ExitStack()
+        serwer = self.stos.enter_context(podlaczony_serwer(url))
+        self.serwer = serwer
+        self.SessionLocal = serwer.SessionLocal
+        with self.SessionLocal() as session:
+            session.add(Uzytkownik(login="test_user", haslo="password123"))
+            session.add_all([
+                Ksiazka(autor=f"Autor {i}", tytul="Tytul", rok_wydania=2000)
+                for i in range(100)])
+            session.commit()
+        serwer.app.testing = True
+        self.client = serwer.app.test_client()
+        dane = b64encode(b"test_user:password123").decode()
+        self.naglowki = {'Authorization': f'Basic {dane}'}
+
+    def tearDown(self):
+        self.stos.close()
+        self.katalog.cleanup()
+
+    def test_gzip_tylko_gdy_klient_akceptuje(self):
+        bez = self.client.get('/ksiazki', headers=self.naglowki)
+        self.assertIsNone(bez.headers.get('Content-Encoding'))
+        self.assertEqual(len(bez.json), 100)
+
+        z_gzip = self.client.get('/ksiazki', headers={
+            **self.naglowki, 'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(z_gzip.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(z_gzip.data)), bez.json)
+
+        odrzucony = self.client.get('/ksiazki', headers={
+            **self.naglowki, 'Accept-Encoding': 'gzip;q=0'})
+        self.assertIsNone(odrzucony.headers.get('Content-Encoding'))
+        self.assertEqual(odrzucony.json, bez.json)
+
+        for odpowiedz in (bez, z_gzip, odrzucony):
+            self.assertIn('Accept-Encoding', odpowiedz.headers['Vary'])
+
+    def test_cache_nie_serializuje_ani_nie_kompresuje_ponownie(self):
+        import serializacja
+        with mock.patch.object(
+                self.serwer, 'ksiazka_do_slownika',
+                wraps=self.serwer.ksiazka_do_slownika) as konwersja, \
+                mock.patch.object(
+                    self.serwer, 'przygotuj_wpis',
+                    wraps=self.serwer.przygotuj_wpis) as serializacja_wpisu, \
+                mock.patch.object(
+                    serializacja.gzip, 'compress',
+                    wraps=gzip.compress) as kompresja:
+            for kodowanie in ('gzip', 'identity', 'gzip'):
+                odpowiedz = self.client.get('/ksiazki', headers={
+                    **self.naglowki, 'Accept-Encoding': kodowanie})
+                self.assertEqual(odpowiedz.status_code, 200)
+        self.assertEqual(konwersja.call_count, 100)
+        self.assertEqual(serializacja_wpisu.call_count, 1)
+        self.assertEqual(kompresja.call_count, 1)
+
+    def test_404_nie_trafia_do_cache(self):
+        odpowiedz = self.client.get('/ksiazka/101', headers=self.naglowki)
+        self.assertEqual(odpowiedz.status_code, 404)
+        with self.SessionLocal() as session:
+            session.add(Ksiazka(autor="Nowy", tytul="Nowa", rok_wydania=2024))
+            session.commit()
+        odpowiedz = self.client.get('/ksiazka/101', headers=self.naglowki)
+        self.assertEqual(odpowiedz.status_code, 200)
+        self.assertEqual(odpowiedz.json["autor"], "Nowy")
+
+
+if __name__ == "__main__":
+    unittest.main()
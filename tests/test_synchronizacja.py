@@ -0,0 +1,206 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import json
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from operacje import Base, Ksiazka, Przyjaciel, Uzytkownik, Wypozyczenie
+from operacje import synchronizuj_dane_z_plikow
+
+
+class TestSynchronizacja(unittest.TestCase):
+    def setUp(self):
+        self.katalog = tempfile.TemporaryDirectory()
+        self.poprzedni_katalog = os.getcwd()
+        os.chdir(self.katalog.name)
+        self.engine = create_engine('sqlite://')
+        event.listen(
+            self.engine, 'connect',
+            lambda dbapi_conn, _: dbapi_conn.execute(
+                'PRAGMA foreign_keys=ON'))
+        Base.metadata.create_all(self.engine)
+        self.session = Session(self.engine)
+        self.zapisz('ksiazki.json', [
+            {"id": 1, "autor": "A", "tytul": "T1", "rok_wydania": 2001},
+            {"id": 2, "autor": "B", "tytul": "T2", "rok_wydania": 2002},
+        ])
+        self.zapisz('przyjaciele.json', [
+            {"id": 1, "imie": "Hania", "email": "hania@mak.com"},
+        ])
+        self.zapisz('uzytkownicy.json', [
+            {"id": 1, "login": "hania", "haslo": "mak"},
+        ])
+        self.zapisz('wypozyczenia.json', [
+            {"id": 1, "ksiazka_id": 1, "przyjaciel_id": 1,
+             "data_wypozyczenia": "2025-01-20"},
+        ])
+
+    def tearDown(self):
+        self.session.close()
+        os.chdir(self.poprzedni_katalog)
+        self.katalog.cleanup()
+
+    def zapisz(self, plik, dane):
+        with open(plik, 'w', encoding='utf-8') as f:
+            json.dump(dane, f)
+
+    def test_ponowna_synchronizacja_nic_nie_zmienia(self):
+        synchronizuj_dane_z_plikow(self.session)
+        zapisy = []
+        event.listen(
+            self.engine, 'before_cursor_execute',
+            lambda conn, cur, sql, *args: zapisy.append(sql)
+            if not sql.lstrip().upper().startswith('SELECT') else None)
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertTrue(all(z == (0, 0, 0) for z in wynik.values()))
+        self.assertEqual(zapisy, [])
+        self.assertEqual(self.session.query(Ksiazka).count(), 2)
+        self.assertEqual(self.session.query(Przyjaciel).count(), 1)
+        self.assertEqual(self.session.query(Uzytkownik).count(), 1)
+
+    def test_wstawia_aktualizuje_i_usuwa(self):
+        synchronizuj_dane_z_plikow(self.session)
+        self.zapisz('ksiazki.json', [
+            {"id": 1, "autor": "A", "tytul": "Nowy", "rok_wydania": 2001},
+            {"id": 3, "autor": "C", "tytul": "T3", "rok_wydania": 2003},
+        ])
+        self.zapisz('przyjaciele.json', [
+            {"id": 1, "imie": "Hanna", "email": "hania@mak.com"},
+        ])
+        self.zapisz('wypozyczenia.json', [])
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertEqual(wynik['Ksiazki'], (1, 1, 1))
+        self.assertEqual(wynik['Przyjaciele'], (0, 1, 0))
+        self.assertEqual(wynik['Wypozyczenia'], (0, 0, 1))
+        self.session.expire_all()
+        self.assertEqual(self.session.get(Ksiazka, 1).tytul, "Nowy")
+        self.assertIsNone(self.session.get(Ksiazka, 2))
+        self.assertEqual(self.session.get(Przyjaciel, 1).imie, "Hanna")
+        self.assertIsNotNone(self.session.get(Wypozyczenie, 1).data_zwrotu)
+
+    def test_zmiana_emaila_i_loginu_przy_tym_samym_id(self):
+        synchronizuj_dane_z_plikow(self.session)
+        self.zapisz('przyjaciele.json', [
+            {"id": 1, "imie": "Hania", "email": "hanna@mak.com"},
+        ])
+        self.zapisz('uzytkownicy.json', [
+            {"id": 1, "login": "hanna", "haslo": "mak"},
+        ])
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertEqual(wynik['Przyjaciele'], (0, 1, 0))
+        self.assertEqual(wynik['Uzytkownicy'], (0, 1, 0))
+        self.session.expire_all()
+        self.assertEqual(
+            self.session.get(Przyjaciel, 1).email, "hanna@mak.com")
+        self.assertEqual(self.session.get(Uzytkownik, 1).login, "hanna")
+        self.assertEqual(
+            self.session.get(Wypozyczenie, 1).przyjaciel_id, 1)
+
+    def test_rekord_bez_id_dopasowany_po_emailu(self):
+        synchronizuj_dane_z_plikow(self.session)
+        self.zapisz('przyjaciele.json', [
+            {"imie": "Hanna", "email": "hania@mak.com"},
+        ])
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertEqual(wynik['Przyjaciele'], (0, 1, 0))
+        self.session.expire_all()
+        self.assertEqual(self.session.get(Przyjaciel, 1).imie, "Hanna")
+
+    def test_nie_usuwa_ksiazek_i_przyjaciol_z_historia_wypozyczen(self):
+        synchronizuj_dane_z_plikow(self.session)
+        self.zapisz('ksiazki.json', [
+            {"id": 2, "autor": "B", "tytul": "T2", "rok_wydania": 2002},
+        ])
+        self.zapisz('przyjaciele.json', [])
+        self.zapisz('wypozyczenia.json', [])
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertEqual(wynik['Wypozyczenia'], (0, 0, 1))
+        self.assertEqual(wynik['Ksiazki'], (0, 0, 0))
+        self.assertEqual(wynik['Przyjaciele'], (0, 0, 0))
+        self.session.expire_all()
+        self.assertIsNotNone(self.session.get(Ksiazka, 1))
+        self.assertIsNotNone(self.session.get(Przyjaciel, 1))
+        self.assertIsNotNone(self.session.get(Wypozyczenie, 1).data_zwrotu)
+
+        self.zapisz('ksiazki.json', [])
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertEqual(wynik['Ksiazki'], (0, 0, 1))
+        self.session.expire_all()
+        self.assertIsNone(self.session.get(Ksiazka, 2))
+
+    def test_odrzuca_ksiazki_i_wypozyczenia_bez_id(self):
+        synchronizuj_dane_z_plikow(self.session)
+        self.zapisz('wypozyczenia.json', [
+            {"ksiazka_id": 2, "przyjaciel_id": 1,
+             "data_wypozyczenia": "2025-01-21"},
+        ])
+        with self.assertRaisesRegex(ValueError, "wypozyczenia.json"):
+            synchronizuj_dane_z_plikow(self.session)
+        self.zapisz('wypozyczenia.json', [])
+        self.zapisz('ksiazki.json', [
+            {"autor": "C", "tytul": "T3", "rok_wydania": 2003},
+        ])
+        with self.assertRaisesRegex(ValueError, "ksiazki.json"):
+            synchronizuj_dane_z_plikow(self.session)
+        self.session.rollback()
+        self.assertEqual(self.session.query(Wypozyczenie).count(), 1)
+        self.assertIsNone(self.session.get(Wypozyczenie, 1).data_zwrotu)
+        self.assertEqual(self.session.query(Ksiazka).count(), 2)
+
+    def test_jedno_aktywne_wypozyczenie_ksiazki(self):
+        synchronizuj_dane_z_plikow(self.session)
+        self.zapisz('wypozyczenia.json', [
+            {"id": 1, "ksiazka_id": 1, "przyjaciel_id": 1,
+             "data_wypozyczenia": "2025-01-20"},
+            {"id": 2, "ksiazka_id": 1, "przyjaciel_id": 1,
+             "data_wypozyczenia": "2025-01-21"},
+        ])
+        with self.assertRaisesRegex(ValueError, "ksiazka_id: 1"):
+            synchronizuj_dane_z_plikow(self.session)
+        self.session.rollback()
+
+        self.zapisz('wypozyczenia.json', [
+            {"id": 2, "ksiazka_id": 1, "przyjaciel_id": 1,
+             "data_wypozyczenia": "2025-01-21"},
+        ])
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertEqual(wynik['Wypozyczenia'], (1, 0, 1))
+        zapisy = []
+        event.listen(
+            self.engine, 'before_cursor_execute',
+            lambda conn, cur, sql, *args: zapisy.append(sql)
+            if not sql.lstrip().upper().startswith('SELECT') else None)
+        wynik = synchronizuj_dane_z_plikow(self.session)
+        self.assertEqual(wynik['Wypozyczenia'], (0, 0, 0))
+        self.assertEqual(zapisy, [])
+        self.session.expire_all()
+        self.assertIsNotNone(self.session.get(Wypozyczenie, 1).data_zwrotu)
+        self.assertIsNone(self.session.get(Wypozyczenie, 2).data_zwrotu)
+
+    def test_komunikat_o_pominietych_wierszach_jest_krotki(self):
+        synchronizuj_dane_z_plikow(self.session)
+        ksiazki = [Ksiazka(autor="A", tytul=f"T{i}", rok_wydania=2000)
+                   for i in range(30)]
+        self.session.add_all(ksiazki)
+        self.session.flush()
+        self.session.add_all([
+            Wypozyczenie(ksiazka_id=k.id, przyjaciel_id=1,
+                         data_zwrotu="2025-01-21 10:00:00")
+            for k in ksiazki])
+        self.session.commit()
+        self.zapisz('ksiazki.json', [])
+        self.zapisz('wypozyczenia.json', [])
+        with mock.patch('builtins.print') as wypisz:
+            synchronizuj_dane_z_plikow(self.session)
+        komunikat = next(c.args[0] for c in wypisz.call_args_list
+                         if 'pominieto' in c.args[0])
+        self.assertIn("Ksiazki: pominieto 31 wierszy", komunikat)
+        identyfikatory = komunikat.split("(id: ")[1].removesuffix(").")
+        self.assertEqual(identyfikatory.split(", ")[-1], "...")
+        self.assertEqual(len(identyfikatory.split(", ")), 11)
+
+if __name__ == "__main__":
+    unittest.main()
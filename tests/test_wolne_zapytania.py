@@ -0,0 +1,88 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from operacje import Base, Ksiazka, Wypozyczenie, lista_ksiazek
+from wolne_zapytania import LogWolnychZapytan, najwolniejsze
+
+
+class TestWolneZapytania(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.log = LogWolnychZapytan(prog_ms=0, plan=True, plik=None)
+        self.log.podlacz(self.engine)
+
+    def tearDown(self):
+        self.log.odlacz(self.engine)
+
+    def test_rejestruje_zapytanie_bez_wartosci_parametrow(self):
+        with Session(self.engine) as session:
+            session.query(Wypozyczenie).filter_by(ksiazka_id=7).first()
+        wpis = self.log.wpisy[-1]
+        self.assertIn("FROM \"Wypozyczenia\"", wpis["zapytanie"])
+        self.assertEqual(wpis["parametry"], "(3)")
+        self.assertNotIn("7", wpis["parametry"])
+        self.assertTrue(any("SCAN" in w or "SEARCH" in w
+                            for w in wpis["plan"]))
+
+    def test_zapisuje_funkcje_wywolujaca(self):
+        with Session(self.engine) as session:
+            lista_ksiazek(session)
+        self.assertRegex(
+            self.log.wpisy[-1]["wywolujacy"], r"^operacje\.py:\d+:lista_ksiazek$")
+
+    def test_flush_wielu_wierszy(self):
+        with Session(self.engine) as session:
+            session.add_all([
+                Wypozyczenie(ksiazka_id=i, przyjaciel_id=1)
+                for i in range(1, 4)])
+            session.commit()
+            self.assertEqual(session.query(Wypozyczenie).count(), 3)
+        wpis = [w for w in self.log.wpisy
+                if w["zapytanie"].startswith("INSERT")][-1]
+        self.assertEqual(wpis["parametry"], "(4)")
+
+    def test_blad_diagnostyki_nie_przerywa_zapytania(self):
+        with mock.patch('wolne_zapytania._ksztalt_parametrow',
+                        side_effect=RuntimeError("blad")):
+            with Session(self.engine) as session:
+                session.query(Ksiazka).all()
+        self.assertEqual(list(self.log.wpisy), [])
+
+    def test_prog_pomija_szybkie_zapytania(self):
+        self.log.prog_ms = 10_000
+        with Session(self.engine) as session:
+            session.query(Ksiazka).all()
+        self.assertEqual(list(self.log.wpisy), [])
+
+    def test_pamiec_ograniczona(self):
+        self.log.odlacz(self.engine)
+        self.log = LogWolnychZapytan(prog_ms=0, plik=None, maks_wpisow=2)
+        self.log.podlacz(self.engine)
+        with Session(self.engine) as session:
+            for _ in range(5):
+                session.query(Ksiazka).all()
+        self.assertEqual(len(self.log.wpisy), 2)
+
+    def test_najwolniejsze_grupuje_po_zapytaniu(self):
+        wpisy = [
+            {"zapytanie": "A", "parametry": "(1)", "czas_ms": 5.0,
+             "wywolujacy": "x"},
+            {"zapytanie": "B", "parametry": "(1)", "czas_ms": 8.0,
+             "wywolujacy": "y"},
+            {"zapytanie": "A", "parametry": "(1)", "czas_ms": 4.0,
+             "wywolujacy": "z"},
+        ]
+        wynik = najwolniejsze(wpisy, limit=1)
+        self.assertEqual(len(wynik), 1)
+        self.assertEqual(wynik[0]["zapytanie"], "A")
+        self.assertEqual(wynik[0]["liczba"], 2)
+        self.assertEqual(wynik[0]["wywolujacy"], ["x", "z"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import json
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from operacje import Base, Ksiazka, Przyjaciel, Wypozyczenie
+from operacje import wypozycz_ksiazke, oddaj_ksiazke, czy_wypozyczona
+from operacje import historia_wypozyczen, stworz_tabele
+
+
+class TestWypozyczenie(unittest.TestCase):
+    def setUp(self):
+        self.katalog = tempfile.TemporaryDirectory()
+        self.poprzedni_katalog = os.getcwd()
+        os.chdir(self.katalog.name)
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        self.session.add_all([
+            Ksiazka(autor="Autor", tytul="Tytul", rok_wydania=2020),
+            Przyjaciel(imie="Imie", email="imie@test.pl"),
+        ])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        os.chdir(self.poprzedni_katalog)
+        self.katalog.cleanup()
+
+    def test_oddanie_zamyka_wypozyczenie(self):
+        wypozycz_ksiazke(self.session, 1, 1)
+        self.assertTrue(czy_wypozyczona(self.session, 1))
+        oddaj_ksiazke(self.session, 1)
+        self.assertFalse(czy_wypozyczona(self.session, 1))
+        wypozyczenie = self.session.get(Wypozyczenie, 1)
+        self.session.refresh(wypozyczenie)
+        self.assertIsNotNone(wypozyczenie.data_zwrotu)
+        with open('wypozyczenia.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [])
+
+    def test_ponowne_wypozyczenie_po_oddaniu(self):
+        wypozycz_ksiazke(self.session, 1, 1)
+        oddaj_ksiazke(self.session, 1)
+        wypozycz_ksiazke(self.session, 1, 1)
+        self.assertEqual(self.session.query(Wypozyczenie).count(), 2)
+        self.assertTrue(czy_wypozyczona(self.session, 1))
+
+    def test_historia_w_partiach(self):
+        for _ in range(5):
+            wypozycz_ksiazke(self.session, 1, 1)
+            oddaj_ksiazke(self.session, 1)
+        wypozycz_ksiazke(self.session, 1, 1)
+        partie = list(historia_wypozyczen(self.session, rozmiar_partii=2))
+        self.assertEqual([len(p) for p in partie], [2, 2, 1])
+        self.assertEqual([w.id for p in partie for w in p], [1, 2, 3, 4, 5])
+
+    def test_migracja_starej_tabeli_wypozyczen(self):
+        engine = create_engine('sqlite://')
+        with engine.begin() as conn:
+            conn.execute(text(
+                'CREATE TABLE "Wypozyczenia" (id INTEGER PRIMARY KEY, '
+                'ksiazka_id INTEGER NOT NULL, przyjaciel_id INTEGER NOT NULL, '
+                'data_wypozyczenia VARCHAR NOT NULL)'))
+        stworz_tabele(engine)
+        stworz_tabele(engine)
+        inspektor = inspect(engine)
+        kolumny = {k['name'] for k in inspektor.get_columns('Wypozyczenia')}
+        self.assertIn('data_zwrotu', kolumny)
+        indeksy = {i['name']: i for i in inspektor.get_indexes('Wypozyczenia')}
+        self.assertTrue(indeksy['ix_wypozyczenia_aktywne']['unique'])
+
+    def test_migracja_zastepuje_nieunikalny_indeks(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text('DROP INDEX ix_wypozyczenia_aktywne'))
+            conn.execute(text(
+                'CREATE INDEX ix_wypozyczenia_aktywne ON "Wypozyczenia" '
+                '(ksiazka_id) WHERE data_zwrotu IS NULL'))
+        stworz_tabele(engine)
+        indeksy = {i['name']: i
+                   for i in inspect(engine).get_indexes('Wypozyczenia')}
+        self.assertTrue(indeksy['ix_wypozyczenia_aktywne']['unique'])
+
+    def test_baza_odrzuca_drugie_aktywne_wypozyczenie(self):
+        wypozycz_ksiazke(self.session, 1, 1)
+        self.session.add(Wypozyczenie(ksiazka_id=1, przyjaciel_id=1))
+        with self.assertRaises(IntegrityError):
+            self.session.commit()
+        self.session.rollback()
+        oddaj_ksiazke(self.session, 1)
+        wypozycz_ksiazke(self.session, 1, 1)
+        self.assertEqual(self.session.query(Wypozyczenie).count(), 2)
+
+    def test_rownoczesne_wypozyczenie_nie_rzuca_wyjatku(self):
+        wypozycz_ksiazke(self.session, 1, 1)
+        with mock.patch('operacje.czy_wypozyczona',
+                        side_effect=[False, True]):
+            wypozycz_ksiazke(self.session, 1, 1)
+        self.assertEqual(self.session.query(Wypozyczenie).count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()